@@ -1,20 +1,118 @@
 import csv
+import gzip
 import io
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
 from uuid import uuid4
 
+import brotli
+import orjson
 from azure.core.exceptions import AzureError, ResourceNotFoundError
 from azure.storage.blob import BlobServiceClient
-from fastapi import FastAPI, File, HTTPException, Query, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
 
 app = FastAPI(title="AFP Data Platform API", version="1.2.0")
 APP_ROOT = Path(__file__).resolve().parent
 STATIC_DIR = APP_ROOT / "static"
 
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "5"))
+_health_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="health")
+
+# Read replica routing: read-only endpoints use SQL_READ_HOST when it is set and its data is
+# no more than SQL_READ_MAX_STALENESS_SECONDS behind the primary (negative disables the check).
+SQL_READ_MAX_STALENESS_SECONDS = float(os.getenv("SQL_READ_MAX_STALENESS_SECONDS", "30"))
+SQL_READ_LAG_CHECK_SECONDS = float(os.getenv("SQL_READ_LAG_CHECK_SECONDS", "15"))
+SQL_READ_CONNECT_TIMEOUT_SECONDS = int(os.getenv("SQL_READ_CONNECT_TIMEOUT_SECONDS", "5"))
+GEO_REPLICATION_LAG_SQL = """
+  SELECT replication_state_desc, replication_lag_sec
+  FROM sys.dm_geo_replication_link_status
+  WHERE partner_server = %s
+"""
+REPLICA_MAX_ID_SQL = "SELECT MAX(id) AS max_id FROM dbo.application_payments_processed"
+PRIMARY_FIRST_MISSING_SQL = """
+  SELECT
+    SYSUTCDATETIME() AS now_utc,
+    (SELECT TOP (1) processed_at FROM dbo.application_payments_processed WHERE id > %s ORDER BY id) AS first_missing_at
+"""
+_replica_lock = threading.Lock()
+_replica_state = {"checked_at": float("-inf"), "fresh": False, "primary_reachable": True}
+
+HTTP_REQUEST_DURATION = Histogram(
+  "afp_http_request_duration_seconds",
+  "HTTP request latency by route.",
+  ["method", "route"],
+)
+HTTP_REQUESTS = Counter("afp_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"])
+HTTP_REQUEST_ERRORS = Counter(
+  "afp_http_request_errors_total",
+  "HTTP requests that raised or returned a 5xx status.",
+  ["method", "route"],
+)
+STAGE_DURATION = Histogram(
+  "afp_stage_duration_seconds",
+  "Time spent in request stages such as schema checks, SQL connect and serialization.",
+  ["stage"],
+)
+SQL_QUERY_DURATION = Histogram("afp_sql_query_duration_seconds", "SQL execute latency by named query.", ["query"])
+SQL_QUERY_ROWS = Histogram(
+  "afp_sql_query_rows",
+  "Rows fetched per named query.",
+  ["query"],
+  buckets=(0, 1, 10, 50, 100, 250, 500, 1000, 5000, 10000),
+)
+SQL_QUERY_ERRORS = Counter("afp_sql_query_errors_total", "SQL executes that raised, by named query.", ["query"])
+SQL_READ_ROUTING = Counter(
+  "afp_sql_read_routing_total",
+  "Read-only connections by target database and routing reason.",
+  ["target", "reason"],
+)
+SQL_READ_REPLICA_LAG = Histogram(
+  "afp_sql_read_replica_lag_seconds",
+  "Replica lag measured against the primary's latest processed row.",
+  buckets=(0, 1, 5, 15, 30, 60, 300, 900, float("inf")),
+)
+
+# Responses smaller than this are sent uncompressed; the framing overhead is not worth it.
+COMPRESSION_MIN_BYTES = 1024
+
+RECORD_COLUMNS = (
+  "id",
+  "source_blob",
+  "row_number",
+  "project",
+  "cost_category",
+  "po",
+  "cost_amount",
+  "certification",
+  "certified_cost",
+  "po_remaining_before",
+  "category_remaining_before",
+  "error_message",
+  "raw_payload",
+  "processed_at",
+)
+
+RAW_INPUT_COLUMNS = (
+  "id",
+  "source_blob",
+  "row_number",
+  "project",
+  "cost_category",
+  "po",
+  "cost_amount",
+  "raw_payload",
+  "ingested_at",
+)
+
 SCHEMA_DDL = """
 IF OBJECT_ID(N'dbo.po_limits', N'U') IS NULL
 BEGIN
@@ -22,20 +120,34 @@ BEGIN
     po NVARCHAR(100) NOT NULL PRIMARY KEY,
     po_value DECIMAL(18,2) NOT NULL,
     total_claimed DECIMAL(18,2) NOT NULL CONSTRAINT DF_po_limits_total_claimed DEFAULT (0),
+    remaining AS (po_value - total_claimed) PERSISTED,
     updated_at DATETIME2(3) NOT NULL CONSTRAINT DF_po_limits_updated_at DEFAULT SYSUTCDATETIME()
   );
 END;
 
+IF COL_LENGTH(N'dbo.po_limits', N'remaining') IS NULL
+  EXEC(N'ALTER TABLE dbo.po_limits ADD remaining AS (po_value - total_claimed) PERSISTED');
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID(N'dbo.po_limits') AND name = N'IX_po_limits_remaining')
+  EXEC(N'CREATE INDEX IX_po_limits_remaining ON dbo.po_limits (remaining) INCLUDE (po_value, total_claimed, updated_at)');
+
 IF OBJECT_ID(N'dbo.category_limits', N'U') IS NULL
 BEGIN
   CREATE TABLE dbo.category_limits (
     category_id NVARCHAR(100) NOT NULL PRIMARY KEY,
     category_limit DECIMAL(18,2) NOT NULL,
     total_claimed DECIMAL(18,2) NOT NULL CONSTRAINT DF_category_limits_total_claimed DEFAULT (0),
+    remaining AS (category_limit - total_claimed) PERSISTED,
     updated_at DATETIME2(3) NOT NULL CONSTRAINT DF_category_limits_updated_at DEFAULT SYSUTCDATETIME()
   );
 END;
 
+IF COL_LENGTH(N'dbo.category_limits', N'remaining') IS NULL
+  EXEC(N'ALTER TABLE dbo.category_limits ADD remaining AS (category_limit - total_claimed) PERSISTED');
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID(N'dbo.category_limits') AND name = N'IX_category_limits_remaining')
+  EXEC(N'CREATE INDEX IX_category_limits_remaining ON dbo.category_limits (remaining) INCLUDE (category_limit, total_claimed, updated_at)');
+
 IF OBJECT_ID(N'dbo.application_payments_processed', N'U') IS NULL
 BEGIN
   CREATE TABLE dbo.application_payments_processed (
@@ -89,6 +201,72 @@ def _to_decimal(value: str, field_name: str) -> Decimal:
     raise HTTPException(status_code=400, detail=f"Invalid decimal value for {field_name}: {value}")
 
 
+def _json_default(value):
+  if isinstance(value, Decimal):
+    return float(value)
+  raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _accepted_encodings(header: str | None) -> set[str]:
+  accepted: set[str] = set()
+  for part in (header or "").split(","):
+    coding, _, params = part.strip().partition(";")
+    coding = coding.strip().lower()
+    if not coding:
+      continue
+    quality = params.strip()
+    if quality.startswith("q="):
+      try:
+        if float(quality[2:]) <= 0:
+          continue
+      except ValueError:
+        continue
+    accepted.add(coding)
+  return accepted
+
+
+@contextmanager
+def _timed_stage(stage: str):
+  started = time.perf_counter()
+  try:
+    yield
+  finally:
+    STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - started)
+
+
+def _json_response(request: Request, payload: dict, status_code: int = 200) -> Response:
+  """Serialize with orjson and compress according to the client's Accept-Encoding."""
+  with _timed_stage("serialize"):
+    body = orjson.dumps(payload, default=_json_default)
+  headers = {"Vary": "Accept-Encoding"}
+  if len(body) >= COMPRESSION_MIN_BYTES:
+    accepted = _accepted_encodings(request.headers.get("accept-encoding"))
+    if "br" in accepted:
+      body = brotli.compress(body, quality=4)
+      headers["Content-Encoding"] = "br"
+    elif "gzip" in accepted or "*" in accepted:
+      body = gzip.compress(body, compresslevel=5)
+      headers["Content-Encoding"] = "gzip"
+  return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def _parse_columns(value: str | None, allowed: tuple[str, ...], param: str) -> list[str]:
+  names = [name.strip() for name in (value or "").split(",") if name.strip()]
+  unknown = [name for name in names if name not in allowed]
+  if unknown:
+    raise HTTPException(status_code=400, detail=f"Unknown {param}: {', '.join(unknown)}")
+  return names
+
+
+def _select_columns(fields: str | None, exclude: str | None, allowed: tuple[str, ...]) -> list[str]:
+  requested = _parse_columns(fields, allowed, "fields") if fields else list(allowed)
+  excluded = set(_parse_columns(exclude, allowed, "exclude"))
+  columns = [name for name in allowed if name in requested and name not in excluded]
+  if not columns:
+    raise HTTPException(status_code=400, detail="fields/exclude must leave at least one column")
+  return columns
+
+
 def get_blob_client() -> BlobServiceClient:
   connection_string = _required_env("BLOB_CONNECTION_STRING")
   return BlobServiceClient.from_connection_string(connection_string)
@@ -105,23 +283,237 @@ def ensure_blob_container_exists(blob_service: BlobServiceClient, container_name
     raise HTTPException(status_code=500, detail="Unable to access blob storage container") from exc
 
 
-def get_sql_connection():
+class InstrumentedCursor:
+  """Cursor wrapper that records latency, row counts and errors per named query."""
+
+  def __init__(self, cursor):
+    self._cursor = cursor
+    self._query_name = "unnamed"
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self._cursor.close()
+
+  def execute(self, query, params=None, *, name: str = "unnamed"):
+    self._query_name = name
+    started = time.perf_counter()
+    try:
+      if params is None:
+        return self._cursor.execute(query)
+      return self._cursor.execute(query, params)
+    except Exception:
+      SQL_QUERY_ERRORS.labels(query=name).inc()
+      raise
+    finally:
+      SQL_QUERY_DURATION.labels(query=name).observe(time.perf_counter() - started)
+
+  def fetchone(self):
+    row = self._cursor.fetchone()
+    SQL_QUERY_ROWS.labels(query=self._query_name).observe(0 if row is None else 1)
+    return row
+
+  def fetchall(self):
+    rows = self._cursor.fetchall()
+    SQL_QUERY_ROWS.labels(query=self._query_name).observe(len(rows))
+    return rows
+
+
+class InstrumentedConnection:
+  def __init__(self, conn):
+    self._conn = conn
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self._conn.close()
+
+  def cursor(self) -> InstrumentedCursor:
+    return InstrumentedCursor(self._conn.cursor())
+
+  def commit(self) -> None:
+    self._conn.commit()
+
+
+def _primary_settings() -> dict:
+  return {
+    "server": _required_env("SQL_HOST"),
+    "user": _required_env("SQL_USER"),
+    "password": _required_env("SQL_PASSWORD"),
+    "database": _required_env("SQL_DATABASE"),
+  }
+
+
+def _read_replica_settings() -> dict | None:
+  server = os.getenv("SQL_READ_HOST")
+  if not server:
+    return None
+  primary = _primary_settings()
+  return {
+    "server": server,
+    "user": os.getenv("SQL_READ_USER") or primary["user"],
+    "password": os.getenv("SQL_READ_PASSWORD") or primary["password"],
+    "database": os.getenv("SQL_READ_DATABASE") or primary["database"],
+    # Sends ApplicationIntent=ReadOnly, so SQL_READ_HOST may equal SQL_HOST for Azure read scale-out.
+    "read_only": True,
+  }
+
+
+def _connect(settings: dict, **connect_kwargs) -> InstrumentedConnection:
   import pymssql
 
-  return pymssql.connect(
-    server=_required_env("SQL_HOST"),
-    user=_required_env("SQL_USER"),
-    password=_required_env("SQL_PASSWORD"),
-    database=_required_env("SQL_DATABASE"),
-    as_dict=True,
-  )
+  with _timed_stage("sql_connect"):
+    conn = pymssql.connect(**settings, as_dict=True, **connect_kwargs)
+  return InstrumentedConnection(conn)
+
+
+def get_sql_connection(**connect_kwargs) -> InstrumentedConnection:
+  return _connect(_primary_settings(), **connect_kwargs)
+
+
+class PrimaryUnavailableError(Exception):
+  """The primary could not be reached while measuring replica lag."""
+
+
+def _replica_partner_server(replica: dict) -> str:
+  # sys.dm_geo_replication_link_status reports the partner by logical server name,
+  # e.g. "sql-afp-secondary" for "sql-afp-secondary.database.windows.net:1433".
+  return replica["server"].split(":")[0].split(",")[0].split(".")[0]
+
+
+def _measure_replica_lag(replica: dict) -> float:
+  """Seconds the replica is behind the primary.
+
+  Azure SQL geo-replication links are read from sys.dm_geo_replication_link_status on the
+  primary; a link that is not in CATCH_UP counts as infinitely stale. Without a link (named
+  replicas, local containers) the replica's MAX(id) of processed rows is compared with the
+  primary, and lag is the age of the first processed row the replica has not received yet.
+  """
+  timeout = SQL_READ_CONNECT_TIMEOUT_SECONDS
+  with _connect(replica, login_timeout=timeout, timeout=timeout) as conn:
+    with conn.cursor() as cursor:
+      cursor.execute(REPLICA_MAX_ID_SQL, name="replica_max_id")
+      replica_max_id = (cursor.fetchone() or {}).get("max_id") or 0
+
+  try:
+    primary_conn = get_sql_connection(login_timeout=timeout, timeout=timeout)
+  except Exception as exc:
+    raise PrimaryUnavailableError(str(exc)) from exc
+
+  with primary_conn as conn:
+    with conn.cursor() as cursor:
+      cursor.execute("SELECT OBJECT_ID(N'sys.dm_geo_replication_link_status') AS dmv_id", name="replica_lag_dmv_probe")
+      if cursor.fetchone()["dmv_id"] is not None:
+        cursor.execute(GEO_REPLICATION_LAG_SQL, (_replica_partner_server(replica),), name="replica_geo_lag")
+        link = cursor.fetchone()
+        if link is not None:
+          if link["replication_state_desc"] != "CATCH_UP" or link["replication_lag_sec"] is None:
+            return float("inf")
+          return float(link["replication_lag_sec"])
+
+      cursor.execute(PRIMARY_FIRST_MISSING_SQL, (replica_max_id,), name="replica_first_missing")
+      row = cursor.fetchone()
+  if row["first_missing_at"] is None:
+    return 0.0
+  return max((row["now_utc"] - row["first_missing_at"]).total_seconds(), 0.0)
+
+
+def _replica_is_fresh(replica: dict) -> bool:
+  if SQL_READ_MAX_STALENESS_SECONDS < 0:
+    return True
+  # Only one request re-measures lag at a time; the rest use the last known answer.
+  if time.monotonic() - _replica_state["checked_at"] >= SQL_READ_LAG_CHECK_SECONDS and _replica_lock.acquire(blocking=False):
+    try:
+      lag = _measure_replica_lag(replica)
+      SQL_READ_REPLICA_LAG.observe(lag)
+      _replica_state["fresh"] = lag <= SQL_READ_MAX_STALENESS_SECONDS
+      _replica_state["primary_reachable"] = True
+    except PrimaryUnavailableError:
+      # No writes can land while the primary is down, so the replica cannot fall further
+      # behind: keep the last measured verdict instead of routing reads to a dead primary.
+      _replica_state["primary_reachable"] = False
+    except Exception:
+      _replica_state["fresh"] = False
+    finally:
+      _replica_state["checked_at"] = time.monotonic()
+      _replica_lock.release()
+  return _replica_state["fresh"]
+
+
+def _primary_read_connection(reason: str) -> InstrumentedConnection:
+  SQL_READ_ROUTING.labels(target="primary", reason=reason).inc()
+  ensure_schema_exists()
+  return get_sql_connection()
+
+
+def get_read_connection() -> InstrumentedConnection:
+  """Connection for read-only endpoints: the replica when configured and fresh, else the primary.
+
+  Schema DDL only runs when the read lands on the primary; replicas receive it through
+  replication (or scripts/local_replica.py locally), so replica reads never touch the primary.
+  """
+  replica = _read_replica_settings()
+  if replica is None:
+    return _primary_read_connection("not_configured")
+  if not _replica_is_fresh(replica):
+    return _primary_read_connection("stale")
+  try:
+    conn = _connect(replica, login_timeout=SQL_READ_CONNECT_TIMEOUT_SECONDS)
+  except Exception:
+    _replica_state["fresh"] = False
+    _replica_state["checked_at"] = time.monotonic()
+    return _primary_read_connection("replica_unavailable")
+  reason = "fresh" if _replica_state["primary_reachable"] else "primary_unreachable"
+  SQL_READ_ROUTING.labels(target="replica", reason=reason).inc()
+  return conn
 
 
 def ensure_schema_exists() -> None:
-  with get_sql_connection() as conn:
+  with _timed_stage("ensure_schema"):
+    with get_sql_connection() as conn:
+      with conn.cursor() as cursor:
+        cursor.execute(SCHEMA_DDL, name="ensure_schema")
+      conn.commit()
+
+
+def _check_sql(read_replica: bool = False) -> None:
+  settings = _read_replica_settings() if read_replica else _primary_settings()
+  timeout = max(1, int(HEALTH_CHECK_TIMEOUT_SECONDS))
+  with _connect(settings, login_timeout=timeout, timeout=timeout) as conn:
     with conn.cursor() as cursor:
-      cursor.execute(SCHEMA_DDL)
-    conn.commit()
+      cursor.execute("SELECT 1 AS ok", name="health_check")
+      cursor.fetchone()
+
+
+def _check_blob() -> None:
+  container_name = _required_env("BLOB_CONTAINER_NAME")
+  timeout = max(1, int(HEALTH_CHECK_TIMEOUT_SECONDS))
+  blob_service = BlobServiceClient.from_connection_string(
+    _required_env("BLOB_CONNECTION_STRING"),
+    connection_timeout=timeout,
+    read_timeout=timeout,
+    retry_total=0,
+  )
+  blob_service.get_container_client(container_name).exists(timeout=timeout)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+  started = time.perf_counter()
+  status = "500"
+  try:
+    response = await call_next(request)
+    status = str(response.status_code)
+    return response
+  finally:
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", "unmatched")
+    HTTP_REQUEST_DURATION.labels(method=request.method, route=route_path).observe(time.perf_counter() - started)
+    HTTP_REQUESTS.labels(method=request.method, route=route_path, status=status).inc()
+    if status.startswith("5"):
+      HTTP_REQUEST_ERRORS.labels(method=request.method, route=route_path).inc()
 
 
 @app.get("/health")
@@ -129,6 +521,37 @@ def health():
   return {"status": "ok", "timestamp_utc": datetime.now(timezone.utc).isoformat()}
 
 
+@app.get("/health/ready")
+def health_ready(request: Request):
+  checks = {"sql": _health_executor.submit(_check_sql), "blob": _health_executor.submit(_check_blob)}
+  if os.getenv("SQL_READ_HOST"):
+    checks["sql_read"] = _health_executor.submit(_check_sql, True)
+  deadline = time.monotonic() + HEALTH_CHECK_TIMEOUT_SECONDS
+  results: dict[str, str] = {}
+  for name, future in checks.items():
+    try:
+      future.result(timeout=max(0.0, deadline - time.monotonic()))
+      results[name] = "ok"
+    except FutureTimeoutError:
+      results[name] = "timeout"
+    except Exception as exc:
+      results[name] = f"error: {type(exc).__name__}"
+
+  # Reads fall back to the primary, so an unavailable replica is reported but does not fail readiness.
+  ready = results["sql"] == "ok" and results["blob"] == "ok"
+  payload = {
+    "status": "ok" if ready else "unavailable",
+    "checks": results,
+    "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+  }
+  return _json_response(request, payload, status_code=200 if ready else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+  return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/", include_in_schema=False)
 def ui_home():
   index_file = STATIC_DIR / "index.html"
@@ -202,7 +625,11 @@ async def seed_po_limits(file: UploadFile = File(...)):
           continue
         po_value = _to_decimal(row.get("PO_value"), "PO_value")
         total_claimed = _to_decimal(row.get("Total_Claimed"), "Total_Claimed")
-        cursor.execute(merge_sql, (po, float(po_value), float(total_claimed), po, float(po_value), float(total_claimed)))
+        cursor.execute(
+          merge_sql,
+          (po, float(po_value), float(total_claimed), po, float(po_value), float(total_claimed)),
+          name="seed_po_limits",
+        )
         count += 1
     conn.commit()
 
@@ -252,6 +679,7 @@ async def seed_category_limits(file: UploadFile = File(...)):
             float(category_limit),
             float(total_claimed),
           ),
+          name="seed_category_limits",
         )
         count += 1
     conn.commit()
@@ -259,41 +687,114 @@ async def seed_category_limits(file: UploadFile = File(...)):
   return {"message": "Category limits seeded", "rows": count}
 
 
-@app.get("/po-limits")
-def get_po_limits():
-  ensure_schema_exists()
-  with get_sql_connection() as conn:
+LIMIT_ORDERINGS = {"key", "remaining", "utilization"}
+
+
+def _query_limits(
+  *,
+  table: str,
+  key_column: str,
+  limit_column: str,
+  remaining_below: Decimal | None,
+  utilization_above: float | None,
+  order_by: str,
+  limit: int | None,
+) -> list[dict]:
+  if order_by not in LIMIT_ORDERINGS:
+    raise HTTPException(status_code=400, detail=f"order_by must be one of: {', '.join(sorted(LIMIT_ORDERINGS))}")
+
+  utilization = f"CAST(total_claimed / NULLIF({limit_column}, 0) AS DECIMAL(38,4))"
+  params: list = []
+  top = ""
+  if limit is not None:
+    top = "TOP (%s) "
+    params.append(limit)
+
+  where_parts: list[str] = []
+  if remaining_below is not None:
+    where_parts.append("remaining < %s")
+    params.append(float(remaining_below))
+  if utilization_above is not None:
+    where_parts.append(f"total_claimed > %s * {limit_column}")
+    params.append(utilization_above)
+
+  where = ""
+  if where_parts:
+    where = " WHERE " + " AND ".join(where_parts)
+
+  order = {
+    "key": key_column,
+    "remaining": f"remaining, {key_column}",
+    "utilization": f"{utilization} DESC, {key_column}",
+  }[order_by]
+
+  query = f"""
+    SELECT {top}{key_column}, {limit_column}, total_claimed, remaining, {utilization} AS utilization, updated_at
+    FROM dbo.{table}{where}
+    ORDER BY {order}
+  """
+  with get_read_connection() as conn:
     with conn.cursor() as cursor:
-      cursor.execute("SELECT po, po_value, total_claimed, updated_at FROM dbo.po_limits ORDER BY po")
-      rows = cursor.fetchall()
-  return {"count": len(rows), "records": rows}
+      cursor.execute(query, tuple(params), name=f"list_{table}")
+      return cursor.fetchall()
+
+
+@app.get("/po-limits")
+def get_po_limits(
+  request: Request,
+  remaining_below: Decimal | None = Query(default=None),
+  utilization_above: float | None = Query(default=None, ge=0),
+  order_by: str = Query(default="key", description="key, remaining or utilization"),
+  limit: int | None = Query(default=None, ge=1, le=10000),
+):
+  rows = _query_limits(
+    table="po_limits",
+    key_column="po",
+    limit_column="po_value",
+    remaining_below=remaining_below,
+    utilization_above=utilization_above,
+    order_by=order_by,
+    limit=limit,
+  )
+  return _json_response(request, {"count": len(rows), "records": rows})
 
 
 @app.get("/category-limits")
-def get_category_limits():
-  ensure_schema_exists()
-  with get_sql_connection() as conn:
-    with conn.cursor() as cursor:
-      cursor.execute("SELECT category_id, category_limit, total_claimed, updated_at FROM dbo.category_limits ORDER BY category_id")
-      rows = cursor.fetchall()
-  return {"count": len(rows), "records": rows}
+def get_category_limits(
+  request: Request,
+  remaining_below: Decimal | None = Query(default=None),
+  utilization_above: float | None = Query(default=None, ge=0),
+  order_by: str = Query(default="key", description="key, remaining or utilization"),
+  limit: int | None = Query(default=None, ge=1, le=10000),
+):
+  rows = _query_limits(
+    table="category_limits",
+    key_column="category_id",
+    limit_column="category_limit",
+    remaining_below=remaining_below,
+    utilization_above=utilization_above,
+    order_by=order_by,
+    limit=limit,
+  )
+  return _json_response(request, {"count": len(rows), "records": rows})
 
 
 @app.get("/records")
 def get_records(
+  request: Request,
   limit: int = Query(default=100, ge=1, le=1000),
   certification: str | None = Query(default=None),
   project: str | None = Query(default=None),
   cost_category: str | None = Query(default=None),
   po: str | None = Query(default=None),
+  fields: str | None = Query(default=None, description="Comma-separated columns to return, e.g. id,po,certified_cost"),
+  exclude: str | None = Query(default=None, description="Comma-separated columns to omit, e.g. raw_payload"),
 ):
-  ensure_schema_exists()
+  columns = _select_columns(fields, exclude, RECORD_COLUMNS)
 
-  base = """
+  base = f"""
     SELECT TOP (%s)
-      id, source_blob, row_number, project, cost_category, po, cost_amount,
-      certification, certified_cost, po_remaining_before, category_remaining_before,
-      error_message, raw_payload, processed_at
+      {", ".join(columns)}
     FROM dbo.application_payments_processed
   """
   params: list = [limit]
@@ -316,31 +817,33 @@ def get_records(
     where = " WHERE " + " AND ".join(where_parts)
 
   query = f"{base}{where} ORDER BY id DESC"
-  with get_sql_connection() as conn:
+  with get_read_connection() as conn:
     with conn.cursor() as cursor:
-      cursor.execute(query, tuple(params))
+      cursor.execute(query, tuple(params), name="list_records")
       rows = cursor.fetchall()
 
-  normalized = []
-  for row in rows:
-    row["raw_payload"] = row.get("raw_payload")
-    normalized.append(row)
-  return {"count": len(normalized), "records": normalized}
+  return _json_response(request, {"count": len(rows), "records": rows})
 
 
 @app.get("/raw-inputs")
-def get_raw_inputs(limit: int = Query(default=200, ge=1, le=1000)):
-  ensure_schema_exists()
-  with get_sql_connection() as conn:
+def get_raw_inputs(
+  request: Request,
+  limit: int = Query(default=200, ge=1, le=1000),
+  fields: str | None = Query(default=None, description="Comma-separated columns to return, e.g. id,po,cost_amount"),
+  exclude: str | None = Query(default=None, description="Comma-separated columns to omit, e.g. raw_payload"),
+):
+  columns = _select_columns(fields, exclude, RAW_INPUT_COLUMNS)
+  with get_read_connection() as conn:
     with conn.cursor() as cursor:
       cursor.execute(
-        """
+        f"""
         SELECT TOP (%s)
-          id, source_blob, row_number, project, cost_category, po, cost_amount, raw_payload, ingested_at
+          {", ".join(columns)}
         FROM dbo.application_payments_raw
         ORDER BY id DESC
         """,
         (limit,),
+        name="list_raw_inputs",
       )
       rows = cursor.fetchall()
-  return {"count": len(rows), "records": rows}
+  return _json_response(request, {"count": len(rows), "records": rows})
@@ -15,20 +15,34 @@ BEGIN
     po NVARCHAR(100) NOT NULL PRIMARY KEY,
     po_value DECIMAL(18,2) NOT NULL,
     total_claimed DECIMAL(18,2) NOT NULL CONSTRAINT DF_po_limits_total_claimed DEFAULT (0),
+    remaining AS (po_value - total_claimed) PERSISTED,
     updated_at DATETIME2(3) NOT NULL CONSTRAINT DF_po_limits_updated_at DEFAULT SYSUTCDATETIME()
   );
 END;
 
+IF COL_LENGTH(N'dbo.po_limits', N'remaining') IS NULL
+  EXEC(N'ALTER TABLE dbo.po_limits ADD remaining AS (po_value - total_claimed) PERSISTED');
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID(N'dbo.po_limits') AND name = N'IX_po_limits_remaining')
+  EXEC(N'CREATE INDEX IX_po_limits_remaining ON dbo.po_limits (remaining) INCLUDE (po_value, total_claimed, updated_at)');
+
 IF OBJECT_ID(N'dbo.category_limits', N'U') IS NULL
 BEGIN
   CREATE TABLE dbo.category_limits (
     category_id NVARCHAR(100) NOT NULL PRIMARY KEY,
     category_limit DECIMAL(18,2) NOT NULL,
     total_claimed DECIMAL(18,2) NOT NULL CONSTRAINT DF_category_limits_total_claimed DEFAULT (0),
+    remaining AS (category_limit - total_claimed) PERSISTED,
     updated_at DATETIME2(3) NOT NULL CONSTRAINT DF_category_limits_updated_at DEFAULT SYSUTCDATETIME()
   );
 END;
 
+IF COL_LENGTH(N'dbo.category_limits', N'remaining') IS NULL
+  EXEC(N'ALTER TABLE dbo.category_limits ADD remaining AS (category_limit - total_claimed) PERSISTED');
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID(N'dbo.category_limits') AND name = N'IX_category_limits_remaining')
+  EXEC(N'CREATE INDEX IX_category_limits_remaining ON dbo.category_limits (remaining) INCLUDE (category_limit, total_claimed, updated_at)');
+
 IF OBJECT_ID(N'dbo.application_payments_processed', N'U') IS NULL
 BEGIN
   CREATE TABLE dbo.application_payments_processed (
@@ -220,7 +234,23 @@ def _upsert_raw_row(
   )
 
 
-def _process_row(cursor, source_blob: str, row_number: int, row: dict) -> None:
+def _load_exhausted_keys(cursor) -> tuple[set[str], set[str]]:
+  # Seeks IX_po_limits_remaining / IX_category_limits_remaining; exhausted keys are few.
+  cursor.execute("SELECT po FROM dbo.po_limits WHERE remaining <= 0")
+  exhausted_pos = {row["po"] for row in cursor.fetchall()}
+  cursor.execute("SELECT category_id FROM dbo.category_limits WHERE remaining <= 0")
+  exhausted_categories = {row["category_id"] for row in cursor.fetchall()}
+  return exhausted_pos, exhausted_categories
+
+
+def _process_row(
+  cursor,
+  source_blob: str,
+  row_number: int,
+  row: dict,
+  exhausted_pos: set[str],
+  exhausted_categories: set[str],
+) -> None:
   project = (row.get("project") or "").strip()
   cost_category = (row.get("cost_category") or "").strip()
   po = (row.get("PO") or "").strip()
@@ -285,6 +315,41 @@ def _process_row(cursor, source_blob: str, row_number: int, row: dict) -> None:
     )
     return
 
+  # Keys already known to be exhausted can never certify anything, so confirm them with a
+  # plain read instead of the UPDLOCK reads below. Under READ COMMITTED this still takes
+  # shared locks and can wait behind in-flight claims; it only saves holding update locks.
+  # Non-exhausted keys skip it and cost no extra round trip.
+  if po in exhausted_pos or cost_category in exhausted_categories:
+    cursor.execute(
+      """
+      SELECT
+        (SELECT remaining FROM dbo.po_limits WHERE po = %s) AS po_remaining,
+        (SELECT remaining FROM dbo.category_limits WHERE category_id = %s) AS category_remaining
+      """,
+      (po, cost_category),
+    )
+    screen_row = cursor.fetchone()
+    if screen_row and screen_row["po_remaining"] is not None and screen_row["category_remaining"] is not None:
+      screened_po_remaining = Decimal(str(screen_row["po_remaining"]))
+      screened_category_remaining = Decimal(str(screen_row["category_remaining"]))
+      if screened_po_remaining <= 0 or screened_category_remaining <= 0:
+        _insert_processed_row(
+          cursor,
+          source_blob=source_blob,
+          row_number=row_number,
+          project=project,
+          cost_category=cost_category,
+          po=po,
+          cost_amount=cost_amount,
+          certification="deauthorized",
+          certified_cost=Decimal("0"),
+          po_remaining_before=max(screened_po_remaining, Decimal("0")),
+          category_remaining_before=max(screened_category_remaining, Decimal("0")),
+          raw_payload=raw_payload,
+          error_message=None,
+        )
+        return
+
   cursor.execute(
     "SELECT po_value, total_claimed FROM dbo.po_limits WITH (UPDLOCK, ROWLOCK) WHERE po = %s",
     (po,),
@@ -351,6 +416,10 @@ def _process_row(cursor, source_blob: str, row_number: int, row: dict) -> None:
       """,
       (float(certified_cost), cost_category),
     )
+    if certified_cost >= po_remaining:
+      exhausted_pos.add(po)
+    if certified_cost >= category_remaining:
+      exhausted_categories.add(cost_category)
 
   _insert_processed_row(
     cursor,
@@ -387,8 +456,9 @@ def main(input_blob: func.InputStream) -> None:
   with get_sql_connection() as conn:
     with conn.cursor() as cursor:
       ensure_schema(cursor)
+      exhausted_pos, exhausted_categories = _load_exhausted_keys(cursor)
       for idx, row in enumerate(reader, start=1):
-        _process_row(cursor, source_blob, idx, row)
+        _process_row(cursor, source_blob, idx, row, exhausted_pos, exhausted_categories)
     conn.commit()
 
   logging.info("Completed AFP blob processing: %s", source_blob)
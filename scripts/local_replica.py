@@ -0,0 +1,96 @@
+"""Prepare two local SQL Server containers for read replica testing.
+
+Uses the same SQL_* / SQL_READ_* environment variables as the API:
+
+  python scripts/local_replica.py init   # create the database and apply sql/schema.sql on both
+  python scripts/local_replica.py sync   # copy every table from the primary to the replica
+"""
+import os
+import sys
+from pathlib import Path
+
+import pymssql
+
+SCHEMA_FILE = Path(__file__).resolve().parent.parent / "sql" / "schema.sql"
+TABLES = ("po_limits", "category_limits", "application_payments_raw", "application_payments_processed")
+IDENTITY_TABLES = {"application_payments_raw", "application_payments_processed"}
+
+
+def _required_env(name: str) -> str:
+  value = os.getenv(name)
+  if not value:
+    raise RuntimeError(f"Missing required environment variable: {name}")
+  return value
+
+
+def _settings() -> dict[str, dict]:
+  primary = {
+    "server": _required_env("SQL_HOST"),
+    "user": _required_env("SQL_USER"),
+    "password": _required_env("SQL_PASSWORD"),
+    "database": _required_env("SQL_DATABASE"),
+  }
+  replica = {
+    "server": _required_env("SQL_READ_HOST"),
+    "user": os.getenv("SQL_READ_USER") or primary["user"],
+    "password": os.getenv("SQL_READ_PASSWORD") or primary["password"],
+    "database": os.getenv("SQL_READ_DATABASE") or primary["database"],
+  }
+  return {"primary": primary, "replica": replica}
+
+
+def init(settings: dict) -> None:
+  with pymssql.connect(**{**settings, "database": "master"}, autocommit=True) as conn:
+    with conn.cursor() as cursor:
+      cursor.execute(f"IF DB_ID(N'{settings['database']}') IS NULL CREATE DATABASE [{settings['database']}]")
+
+  with pymssql.connect(**settings) as conn:
+    with conn.cursor() as cursor:
+      cursor.execute(SCHEMA_FILE.read_text())
+    conn.commit()
+
+
+def _copy_columns(cursor, table: str) -> list[str]:
+  cursor.execute(
+    "SELECT name FROM sys.columns WHERE object_id = OBJECT_ID(%s) AND is_computed = 0 ORDER BY column_id",
+    (f"dbo.{table}",),
+  )
+  return [row[0] for row in cursor.fetchall()]
+
+
+def sync(primary: dict, replica: dict) -> None:
+  with pymssql.connect(**primary) as source, pymssql.connect(**replica) as target:
+    with source.cursor() as read_cursor, target.cursor() as write_cursor:
+      for table in TABLES:
+        columns = _copy_columns(read_cursor, table)
+        read_cursor.execute(f"SELECT {', '.join(columns)} FROM dbo.{table}")
+        rows = read_cursor.fetchall()
+
+        write_cursor.execute(f"DELETE FROM dbo.{table}")
+        if table in IDENTITY_TABLES:
+          write_cursor.execute(f"SET IDENTITY_INSERT dbo.{table} ON")
+        if rows:
+          placeholders = ", ".join(["%s"] * len(columns))
+          write_cursor.executemany(f"INSERT INTO dbo.{table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+        if table in IDENTITY_TABLES:
+          write_cursor.execute(f"SET IDENTITY_INSERT dbo.{table} OFF")
+        print(f"{table}: {len(rows)} rows")
+    target.commit()
+
+
+def main(argv: list[str]) -> int:
+  if len(argv) != 2 or argv[1] not in {"init", "sync"}:
+    print(__doc__)
+    return 2
+  settings = _settings()
+  if argv[1] == "init":
+    for name, target in settings.items():
+      init(target)
+      print(f"{name}: schema applied to {target['server']}/{target['database']}")
+  else:
+    sync(settings["primary"], settings["replica"])
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv))
@@ -4,20 +4,34 @@ BEGIN
     po NVARCHAR(100) NOT NULL PRIMARY KEY,
     po_value DECIMAL(18,2) NOT NULL,
     total_claimed DECIMAL(18,2) NOT NULL CONSTRAINT DF_po_limits_total_claimed DEFAULT (0),
+    remaining AS (po_value - total_claimed) PERSISTED,
     updated_at DATETIME2(3) NOT NULL CONSTRAINT DF_po_limits_updated_at DEFAULT SYSUTCDATETIME()
   );
 END;
 
+IF COL_LENGTH(N'dbo.po_limits', N'remaining') IS NULL
+  EXEC(N'ALTER TABLE dbo.po_limits ADD remaining AS (po_value - total_claimed) PERSISTED');
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID(N'dbo.po_limits') AND name = N'IX_po_limits_remaining')
+  EXEC(N'CREATE INDEX IX_po_limits_remaining ON dbo.po_limits (remaining) INCLUDE (po_value, total_claimed, updated_at)');
+
 IF OBJECT_ID(N'dbo.category_limits', N'U') IS NULL
 BEGIN
   CREATE TABLE dbo.category_limits (
     category_id NVARCHAR(100) NOT NULL PRIMARY KEY,
     category_limit DECIMAL(18,2) NOT NULL,
     total_claimed DECIMAL(18,2) NOT NULL CONSTRAINT DF_category_limits_total_claimed DEFAULT (0),
+    remaining AS (category_limit - total_claimed) PERSISTED,
     updated_at DATETIME2(3) NOT NULL CONSTRAINT DF_category_limits_updated_at DEFAULT SYSUTCDATETIME()
   );
 END;
 
+IF COL_LENGTH(N'dbo.category_limits', N'remaining') IS NULL
+  EXEC(N'ALTER TABLE dbo.category_limits ADD remaining AS (category_limit - total_claimed) PERSISTED');
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID(N'dbo.category_limits') AND name = N'IX_category_limits_remaining')
+  EXEC(N'CREATE INDEX IX_category_limits_remaining ON dbo.category_limits (remaining) INCLUDE (category_limit, total_claimed, updated_at)');
+
 IF OBJECT_ID(N'dbo.application_payments_processed', N'U') IS NULL
 BEGIN
   CREATE TABLE dbo.application_payments_processed (